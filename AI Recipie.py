@@ -1,6 +1,15 @@
+import asyncio  # For running the asynchronous Gemini calls
+import atexit  # For closing the client's connections when the script exits
+import contextlib  # For handing a streaming request's slot over to the caller
+import functools  # For reusing the generation config variants
 import os  # For interacting with the operating system (e.g., environment variables)
+import re  # For splitting batched responses into individual recipes
 import sys  # For system-specific parameters and functions (e.g., exiting the script)
-import google.generativeai as genai  # The Google Generative AI library
+import threading  # For running the event loop in the background and opening the on-disk cache only once
+from cachetools import TTLCache  # In-memory cache whose entries expire after a fixed time
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential  # For retrying failed requests
+from google import genai  # The Google GenAI SDK (google-genai)
+from google.genai import types  # Typed request options for the SDK
 from google.genai.errors import APIError  # For handling API-related errors
 
 # --- Configuration Section ---
@@ -9,6 +18,18 @@ from google.genai.errors import APIError  # For handling API-related errors
 
 API_KEY_NAME = 'GEMINI_API_KEY'  # The name of the environment variable storing the API key
 MODEL_NAME = 'gemini-2.5-flash'  # The name of the Gemini model to use
+CACHE_MAXSIZE = 512  # The maximum number of recipes kept in the in-memory cache
+CACHE_TTL_SECONDS = 600  # How long (in seconds) a cached recipe stays valid
+CACHE_PATH_NAME = 'RECIPE_CACHE_PATH'  # Optional environment variable: folder for an on-disk cache
+MAX_OUTPUT_TOKENS = 1200  # Token limit for a single recipe (a full recipe is well under this)
+MIN_INGREDIENT_LETTERS = 2  # An ingredient needs at least this many (ASCII) letters to count as a real one
+MAX_PROMPT_TOKENS = 2048  # The longest prompt (in tokens) sent for a single recipe; longer inputs are refused
+MAX_BATCH_SIZE = 6  # The maximum number of recipes requested in one batched Gemini call
+HTTP_TIMEOUT_MS = 60_000  # Per-request HTTP timeout for Gemini calls, in milliseconds
+MAX_CONCURRENT_REQUESTS = 8  # The maximum number of Gemini requests in flight at once, per process (see the README)
+RETRY_ATTEMPTS = 5  # How many times a request is attempted before a transient error is reported
+RETRY_MAX_WAIT_SECONDS = 20  # The longest wait between attempts (also caps the server's Retry-After)
+RETRY_STATUS_CODES = {429, 500, 503, 504}  # HTTP status codes worth retrying (rate limits and server errors)
 
 # Check if the API key is set as an environment variable
 if API_KEY_NAME not in os.environ:
@@ -19,16 +40,107 @@ if API_KEY_NAME not in os.environ:
 # --- Gemini Client Initialisation ---
 # This section initialises the Gemini client with the API key.
 try:
-    # Configure the API key using the value from the environment variable
-    genai.configure(api_key=os.environ.get(API_KEY_NAME))
-
-    # Access the specified Gemini model
-    model = genai.GenerativeModel(MODEL_NAME)
+    # Create a single long-lived client using the API key from the environment variable.
+    # Its asynchronous interface (client.aio) is used for all requests below, so every call
+    # reuses the same pooled keep-alive HTTPS connections instead of opening new ones.
+    client = genai.Client(
+        api_key=os.environ.get(API_KEY_NAME),
+        http_options=types.HttpOptions(timeout=HTTP_TIMEOUT_MS),
+    )
+    atexit.register(client.close)  # Close the pooled connections when the script exits
 
 except Exception as e:
     print(f"Error initialising Gemini client. Check your key and network connection: {e}")
     sys.exit(1)  # Exit the script if the client cannot be initialised
 
+# --- Response Cache Section ---
+# This section caches generated recipes by the user's (normalised) preferences,
+# so repeating the same request is answered locally instead of calling Gemini again.
+# Setting the RECIPE_CACHE_PATH environment variable also keeps recipes on disk for later runs
+# (this needs the diskcache package, which is safe to share between several server workers).
+CACHE = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL_SECONDS)
+
+_disk_cache = None  # The on-disk cache, opened on first use
+_disk_cache_failed = False  # Set when the on-disk cache can't be used, so only the in-memory cache is used
+_disk_cache_lock = threading.Lock()  # Makes sure the on-disk cache is only opened once
+
+def make_cache_key(ingredients, diet, cuisine, time):
+    """
+    Builds the cache key for a set of preferences. Case and surrounding whitespace
+    are ignored, so "Chicken " and "chicken" share the same cached recipe.
+    """
+    return tuple(value.lower().strip() for value in (ingredients, diet, cuisine, time))
+
+def disable_disk_cache(error):
+    """
+    Reports a problem with the on-disk cache (once) and falls back to the in-memory cache.
+    """
+    global _disk_cache_failed
+    if not _disk_cache_failed:
+        _disk_cache_failed = True
+        print(f"\n[Cache Warning] The on-disk cache can't be used, so only the in-memory cache is used: {error}")
+
+def open_disk_cache():
+    """
+    Returns the on-disk cache, or None if it is not enabled or could not be opened.
+    """
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None and not _disk_cache_failed and CACHE_PATH_NAME in os.environ:
+            try:
+                import diskcache  # Only needed when the on-disk cache is enabled
+                _disk_cache = diskcache.Cache(os.environ[CACHE_PATH_NAME])
+                atexit.register(_disk_cache.close)  # Close the cache files when the script exits
+            except Exception as e:
+                disable_disk_cache(e)
+    return _disk_cache
+
+def read_disk_cache(key):
+    """
+    Returns the recipe stored on disk for the given key, or None. Expired entries are
+    never returned (diskcache removes them itself).
+    """
+    disk_cache = open_disk_cache()
+    if disk_cache is None:
+        return None
+    try:
+        return disk_cache.get(key)
+    except Exception as e:
+        disable_disk_cache(e)
+        return None
+
+def write_disk_cache(key, recipe_text):
+    """
+    Stores a recipe on disk, expiring after CACHE_TTL_SECONDS.
+    """
+    disk_cache = open_disk_cache()
+    if disk_cache is None:
+        return
+    try:
+        disk_cache.set(key, recipe_text, expire=CACHE_TTL_SECONDS)
+    except Exception as e:
+        disable_disk_cache(e)
+
+async def get_cached_recipe(key):
+    """
+    Returns the cached recipe text for the given key, or None if there is no valid entry.
+    """
+    recipe_text = CACHE.get(key)
+    if recipe_text is None and CACHE_PATH_NAME in os.environ and not _disk_cache_failed:
+        # Fall back to the on-disk cache, in a worker thread so the event loop is not blocked
+        recipe_text = await asyncio.to_thread(read_disk_cache, key)
+        if recipe_text is not None:
+            CACHE[key] = recipe_text  # Promote to the in-memory cache for faster reuse
+    return recipe_text
+
+async def store_cached_recipe(key, recipe_text):
+    """
+    Stores a generated recipe in the in-memory cache (and the on-disk cache, if enabled).
+    """
+    CACHE[key] = recipe_text
+    if CACHE_PATH_NAME in os.environ and not _disk_cache_failed:
+        await asyncio.to_thread(write_disk_cache, key, recipe_text)
+
 # --- User Input Section ---
 # This section defines the function to gather user preferences for the recipe.
 def get_user_preferences():
@@ -51,121 +163,479 @@ def get_user_preferences():
         
     return ingredients, diet, cuisine, time  # Return the gathered preferences
 
+def is_real_ingredient(ingredient):
+    """
+    Returns True if a single ingredient has at least MIN_INGREDIENT_LETTERS letters,
+    or at least one non-ASCII letter.
+    """
+    letters = [character for character in ingredient if character.isalpha()]
+    return len(letters) >= MIN_INGREDIENT_LETTERS or any(not letter.isascii() for letter in letters)
+
+def has_real_ingredient(ingredients):
+    """
+    A quick local check that at least one of the comma-separated ingredients looks like
+    a real word, so obviously invalid input (e.g. "1", "?", "x, y") is rejected without
+    calling the Gemini API. A single non-ASCII letter is enough, since ingredient names in
+    languages such as Chinese can be one character long (e.g. "盐", salt).
+    """
+    return any(is_real_ingredient(ingredient) for ingredient in ingredients.split(","))
+
 # --- Prompt Construction Section ---
-# This section defines the function to construct the prompt for the Gemini model.
+# This section defines the system instruction and the function to construct the prompt for the Gemini model.
+
+# System instruction defines the model's persona, constraints, and desired output format.
+# It is the same for every request, so it is sent in the config's system_instruction field
+# rather than being repeated in each prompt.
+# A short format schema is used instead of a full example recipe to keep the prompt small.
+SYSTEM_INSTRUCTION = (
+    "You are a professional chef and creative recipe developer. "
+    "Generate complete, easy-to-follow recipes with detailed cooking steps, based on the user's inputs and constraints. "
+    "Format each recipe exactly as:\n"
+    "**Recipe Title:** <title>\n"
+    "**Ingredients:**\n- <ingredient>: <quantity>\n"
+    "**Instructions:**\nStep <n>: <step>\n"
+    "**Nutritional Information (per serving):**\n"
+    "- Calories: <approx.>\n- Protein: <g>\n- Fat: <g>\n- Carbohydrates: <g>\n"
+    "No introductory or concluding remarks."
+)
+
 def create_recipe_prompt(ingredients, diet, cuisine, time):
     """
-    Constructs the full prompt for the Gemini model, including system instructions
-    and user preferences. The prompt is designed to elicit a recipe with detailed
-    cooking steps and nutritional information.
+    Constructs the user prompt for the Gemini model from the user's preferences. Together
+    with SYSTEM_INSTRUCTION it is designed to elicit a recipe with detailed cooking steps
+    and nutritional information.
     """
-    
-    # System instruction defines the model's persona, constraints, and desired output format
-    system_instruction = (
-        "You are a professional chef and creative recipe developer. "
-        "Your task is to generate a single, complete, and easy-to-follow recipe "
-        "based on the user's specific inputs and constraints. "
-        "The recipe MUST be structured as follows (EXAMPLE):\n\n"
-        "**Recipe Title:** Delicious Chicken Stir-Fry\n\n"
-        "**Ingredients:**\n"
-        "- Chicken breast: 1 lb, cubed\n"
-        "- Broccoli florets: 1 cup\n"
-        "- Soy sauce: 2 tbsp\n"
-        "- Ginger: 1 tsp, minced\n"
-        "- Garlic: 2 cloves, minced\n"
-        "- Cooked rice: 2 cups\n\n"
-        "**Instructions:**\n"
-        "Step 1: Heat a wok or large skillet over high heat.\n"
-        "Step 2: Add the chicken and stir-fry until cooked through.\n"
-        "Step 3: Add the broccoli, soy sauce, ginger, and garlic.\n"
-        "Step 4: Stir-fry for another 3-5 minutes, until the broccoli is tender-crisp.\n"
-        "Step 5: Serve over cooked rice.\n\n"
-        "**Nutritional Information (per serving):**\n"
-        "- Calories: Approximately 400\n"
-        "- Protein: 30g\n"
-        "- Fat: 15g\n"
-        "- Carbohydrates: 40g\n\n"
-        "Do not include any introductory or concluding remarks. Only provide the recipe in the specified format."
-    )
-    
     # Construct the main user prompt with preferences
-    user_prompt = f"""
-    Generate a recipe with the following characteristics:
-    - **Main Ingredients:** {ingredients}
-    - **Dietary Needs/Preferences:** {diet}
-    - **Preferred Cuisine/Style:** {cuisine}
-    - **Time Constraint:** {time}
+    user_prompt = (
+        "Generate a recipe with the following characteristics:\n"
+        f"- **Main Ingredients:** {ingredients}\n"
+        f"- **Dietary Needs/Preferences:** {diet}\n"
+        f"- **Preferred Cuisine/Style:** {cuisine}\n"
+        f"- **Time Constraint:** {time}"
+    )
     
-    Ensure the recipe includes detailed cooking steps and nutritional information (calories, protein, fat, carbohydrates per serving) and adheres to the format specified in the system instructions.
+    return user_prompt  # Return the constructed prompt
+
+# --- Generation Settings Section ---
+# This section defines the generation settings shared by every Gemini request. They are
+# built once as typed SDK objects, so they are not rebuilt and re-validated on each call.
+SAFETY_SETTINGS = [
+    types.SafetySetting(category=category, threshold=types.HarmBlockThreshold.BLOCK_ONLY_HIGH)
+    for category in (
+        types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+        types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+        types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+        types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+    )
+]
+
+GENERATION_CONFIG = types.GenerateContentConfig(
+    system_instruction=SYSTEM_INSTRUCTION,  # Sent in its own field rather than in the contents
+    temperature=0.8,  # Higher temperature for more creativity
+    max_output_tokens=MAX_OUTPUT_TOKENS,  # Upper bound on the response length
+    thinking_config=types.ThinkingConfig(thinking_budget=0),  # Skip hidden "thinking" tokens, which also count towards the limit
+    safety_settings=SAFETY_SETTINGS,
+)
+
+@functools.lru_cache(maxsize=32)
+def make_generation_config(max_output_tokens=MAX_OUTPUT_TOKENS):
     """
-    
-    return system_instruction, user_prompt  # Return the constructed prompt
+    Returns the generation config for a request. Batched requests pass a larger
+    max_output_tokens; each variant is built once and then reused.
+    """
+    if max_output_tokens == MAX_OUTPUT_TOKENS:
+        return GENERATION_CONFIG
+    return GENERATION_CONFIG.model_copy(update={"max_output_tokens": max_output_tokens})
+
+# --- Concurrency Section ---
+# This section bounds how many Gemini requests run at the same time, so independent
+# requests can overlap without exceeding the API's requests-per-minute limits.
+# The limit applies to each process: a server with several workers allows
+# MAX_CONCURRENT_REQUESTS requests per worker.
+_request_semaphore = None  # Created on first use, inside the running event loop
+
+def get_request_semaphore():
+    """
+    Returns the semaphore shared by every Gemini request, creating it on first use.
+    """
+    global _request_semaphore
+    if _request_semaphore is None:
+        _request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return _request_semaphore
+
+# --- Connection Warm-Up Section ---
+# This section opens the connection to Gemini while the user is still typing, so the
+# DNS lookup and TLS handshake are done by the time the recipe is requested.
+async def warm_up_connection():
+    """
+    Makes a cheap count_tokens call to open a pooled HTTPS connection.
+    Failures are ignored; the real request reports any errors.
+    """
+    try:
+        async with get_request_semaphore():  # Counts towards the concurrent request limit like any other call
+            await client.aio.models.count_tokens(model=MODEL_NAME, contents="ping")
+    except Exception:
+        pass  # Warming up is only an optimisation
+
+# --- Retry Section ---
+# This section retries requests that fail with a transient error (rate limiting or a
+# temporary server problem), waiting a little longer before each new attempt.
+_random_backoff = wait_random_exponential(min=1, max=RETRY_MAX_WAIT_SECONDS)  # Exponential backoff with random jitter
+
+def is_transient_error(exception):
+    """
+    Returns True for API errors that are likely to succeed if the request is retried.
+    """
+    return isinstance(exception, APIError) and exception.code in RETRY_STATUS_CODES
+
+def wait_before_retry(retry_state):
+    """
+    Returns how long to wait before the next attempt: the server's Retry-After header
+    when it sends one (at most RETRY_MAX_WAIT_SECONDS), otherwise exponential backoff with jitter.
+    """
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after")
+    try:
+        return min(max(float(retry_after), 0), RETRY_MAX_WAIT_SECONDS)
+    except (TypeError, ValueError):
+        return _random_backoff(retry_state)  # No (numeric) Retry-After header
+
+retry_transient_errors = retry(
+    retry=retry_if_exception(is_transient_error),
+    wait=wait_before_retry,
+    stop=stop_after_attempt(RETRY_ATTEMPTS),
+    reraise=True,  # Raise the last APIError itself, so callers handle it as before
+)
+
+# --- Gemini Request Section ---
+# This section sends the actual requests to Gemini, retrying transient errors.
+@retry_transient_errors
+async def request_recipe(contents, max_output_tokens=MAX_OUTPUT_TOKENS):
+    """
+    Sends one generate_content request and returns the response. The request slot is
+    only held while the request is in flight, not while waiting to retry.
+    """
+    async with get_request_semaphore():  # Wait for a free request slot
+        return await client.aio.models.generate_content(
+            model=MODEL_NAME,
+            contents=contents,
+            config=make_generation_config(max_output_tokens)
+        )
+
+@retry_transient_errors
+async def open_recipe_stream(contents, request_slot):
+    """
+    Starts a streaming request and waits for its first chunk, so that errors sent back
+    for the request itself are raised (and retried) here. Returns an async iterator over
+    all of the chunks. Errors after the first chunk are not retried, since part of the
+    recipe has already been shown by then.
+
+    Each attempt takes its own request slot, which is given back before waiting to retry.
+    Once the stream is open, the slot is handed to request_slot (an AsyncExitStack owned
+    by the caller), so it stays taken until the caller has finished reading the stream.
+    """
+    async with contextlib.AsyncExitStack() as attempt_slot:
+        await attempt_slot.enter_async_context(get_request_semaphore())  # Wait for a free request slot
+        stream = await client.aio.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=contents,
+            config=make_generation_config()
+        )
+        try:
+            first_chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None  # The stream was empty
+        request_slot.push_async_exit(attempt_slot.pop_all())  # The stream is open: the caller now holds the slot
+
+    async def chunks():
+        if first_chunk is not None:
+            yield first_chunk
+        async for chunk in stream:
+            yield chunk
+
+    return chunks()
+
+# --- Prompt Size Section ---
+# This section refuses oversize prompts (e.g. a huge pasted ingredient list) before they are
+# sent, since Gemini would otherwise process the whole prompt before responding.
+class PromptTooLongError(ValueError):
+    """
+    Raised when the user's input makes the prompt longer than MAX_PROMPT_TOKENS.
+    """
+
+async def check_prompt_size(contents):
+    """
+    Raises PromptTooLongError if the prompt is longer than MAX_PROMPT_TOKENS. Short prompts
+    are accepted locally; only longer ones are measured with a (cheap) count_tokens call.
+    If that call fails, the prompt is accepted and the recipe request itself (which is
+    retried on transient errors) reports any problem.
+    """
+    if len(contents) <= MAX_PROMPT_TOKENS:
+        return  # Tokens are almost always at least one character long, so this prompt fits
+
+    try:
+        async with get_request_semaphore():  # Counts towards the concurrent request limit like any other call
+            response = await client.aio.models.count_tokens(model=MODEL_NAME, contents=contents)
+    except Exception:
+        return  # The size could not be checked (API or network error); send the request anyway
+    if response.total_tokens > MAX_PROMPT_TOKENS:
+        raise PromptTooLongError(
+            f"The request is too long ({response.total_tokens} tokens; the limit is {MAX_PROMPT_TOKENS}). "
+            "Please shorten the ingredients or preferences."
+        )
+
+# --- Streaming Section ---
+# This section streams a recipe for one set of preferences. It is shared by the command-line
+# interface below and by the HTTP server (server.py).
+async def stream_recipe_text(ingredients, diet, cuisine, time):
+    """
+    Yields the recipe text as it is generated (a cached recipe is yielded in one piece),
+    then caches the complete recipe. API errors and PromptTooLongError are raised to the caller.
+    """
+    cache_key = make_cache_key(ingredients, diet, cuisine, time)  # Normalised key for the cache
+    recipe_text = await get_cached_recipe(cache_key)  # Reuse an earlier recipe if one is cached
+    if recipe_text is not None:
+        yield recipe_text
+        return
+
+    user_prompt = create_recipe_prompt(ingredients, diet, cuisine, time)  # Construct the prompt
+    await check_prompt_size(user_prompt)  # Refuse oversize prompts before sending them
+    chunks = []  # Buffer of the streamed text, joined at the end for caching
+
+    async with contextlib.AsyncExitStack() as request_slot:  # Holds the request slot until the stream is finished
+        # Open the stream (retrying transient errors); chunks arrive while the recipe is still being written
+        stream = await open_recipe_stream(user_prompt, request_slot)
+
+        async for response in stream:
+            if response.text:
+                chunks.append(response.text)
+                yield response.text
+
+    recipe_text = "".join(chunks).strip()  # The complete recipe, as it would have been returned unstreamed
+    if recipe_text:
+        await store_cached_recipe(cache_key, recipe_text)  # Remember the recipe for repeat requests
 
 # --- API Call and Output Section ---
 # This section defines the function to generate the recipe using the Gemini API
 # and print the output.
-def generate_recipe():
+async def generate_recipe(ingredients, diet, cuisine, time):
     """
-    Generates and prints the recipe using the Gemini API, handling potential errors
-    and validating the response.
+    Generates and prints the recipe for the user's preferences using the Gemini API,
+    handling potential errors and validating the response.
     """
-    ingredients, diet, cuisine, time = get_user_preferences()  # Get user preferences
+    # Fail fast on input that can't make a recipe, without spending an API call
+    if not has_real_ingredient(ingredients):
+        print("Need at least one real ingredient to generate a recipe.")
+        return
 
-    system_instruction, user_prompt = create_recipe_prompt(
-        ingredients, diet, cuisine, time
-    )  # Construct the prompt
+    if await get_cached_recipe(make_cache_key(ingredients, diet, cuisine, time)) is not None:
+        print("\n--- Cache hit: reusing a recipe generated earlier for these preferences. ---")
+    else:
+        # Nothing cached: the recipe is streamed, so text is shown as soon as the model produces it
+        print("\n--- Cache miss: streaming a new recipe from Gemini. ---")
+
+    print("\n" + "=" * 50)
+    print("🍳 YOUR RECIPE")
+    print("=" * 50)
+
+    chunks = []  # Everything printed so far, to check that a recipe was actually returned
 
-    print("\n--- Generating Recipe... This may take a moment. ---")
-    
     try:
-        # Use the generate_content method on the model object to generate the recipe
-        response = model.generate_content(
-            system_instruction + "\n" + user_prompt,  # Combine system and user prompts
-            generation_config={
-                "temperature": 0.8,  # Higher temperature for more creativity
-                "max_output_tokens": 5012  # Increased token limit to allow for longer responses
-            },
-            safety_settings=[
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_ONLY_HIGH"  
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_ONLY_HIGH"  
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_ONLY_HIGH"  
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_ONLY_HIGH"  
-                },
-            ]
-        )
+        async for text in stream_recipe_text(ingredients, diet, cuisine, time):
+            print(text, end="", flush=True)  # Print each chunk as soon as it arrives
+            chunks.append(text)
+
+    except PromptTooLongError as e:
+        print(f"\n[Input Error] {e}")
+        return
+    except APIError as e:
+        print(f"\n[API Error] Could not generate recipe: {e}")
+        print(f"Full API Response: {e}")  # Print the full error response
+        return
+    except Exception as e:
+        print(f"\n[Runtime Error] An unexpected error occurred: {e}")
+        print(f"Full Exception: {e}")  # Print the full exception
+        return
+
+    print("\n" + "=" * 50)
 
-        print("\n" * 2 + "=" * 50)
+    # Check if any valid recipe text was returned
+    if "".join(chunks).strip():
         print("✅ RECIPE GENERATED SUCCESSFULLY")
-        print("=" * 50)
+    else:
+        print("⚠️ No valid recipe text found in the response.")
+
+    print("=" * 50)
+
+# --- Batch Generation Section ---
+# This section generates several recipes with a single Gemini call (e.g. for a meal plan).
+# Packing the requests into one prompt needs one round-trip instead of one per recipe.
+# A delimiter line, allowing markdown decoration such as "**--- RECIPE 2 ---**" or "## --- RECIPE 1 ---"
+RECIPE_DELIMITER = re.compile(r"^[ \t*#_]*-{3}\s*RECIPE\s+(\d+)\s*-{3}[ \t*_]*$", re.MULTILINE | re.IGNORECASE)
+# A delimiter anywhere in the text, used to spot recipes that weren't split apart properly
+ANY_RECIPE_DELIMITER = re.compile(r"-{3}\s*RECIPE\s+\d+\s*-{3}", re.IGNORECASE)
+
+def create_batch_prompt(preference_batch):
+    """
+    Constructs one prompt containing a numbered block per set of preferences,
+    asking the model to answer each block with its own delimited recipe.
+    """
+    blocks = [
+        f"--- REQUEST {number} ---\n"
+        f"- **Main Ingredients:** {ingredients}\n"
+        f"- **Dietary Needs/Preferences:** {diet}\n"
+        f"- **Preferred Cuisine/Style:** {cuisine}\n"
+        f"- **Time Constraint:** {time}"
+        for number, (ingredients, diet, cuisine, time) in enumerate(preference_batch, start=1)
+    ]
+
+    return (
+        f"Generate {len(preference_batch)} separate recipes, one for each request below. "
+        "Treat every request independently. Start each recipe with a line of the form "
+        "'--- RECIPE <n> ---', where <n> is the number of the request it answers, and "
+        "follow it with the recipe in the format specified in the system instructions, "
+        "including detailed cooking steps and nutritional information.\n\n"
+        + "\n\n".join(blocks)
+    )
+
+def parse_batch_response(text, count):
+    """
+    Splits a batched response on its '--- RECIPE <n> ---' delimiters. Returns a list of
+    `count` recipe texts, with None for any recipe the model did not return (or that still
+    contains another delimiter, so it would not be cached holding more than one recipe).
+    A number that appears more than once is also None, since it is unclear which recipe is
+    the right one.
+    """
+    recipes = [None] * count
+    seen = set()
+    parts = RECIPE_DELIMITER.split(text)  # [preamble, number, recipe, number, recipe, ...]
+    for number, recipe_text in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if index in seen:
+            recipes[index] = None  # Repeated number; neither recipe can be trusted
+            continue
+        seen.add(index)
+        recipe_text = recipe_text.strip()
+        if 0 <= index < count and recipe_text and not ANY_RECIPE_DELIMITER.search(recipe_text):
+            recipes[index] = recipe_text
+    return recipes
+
+async def prompt_fits(preferences):
+    """
+    Returns False (and reports it) if the prompt for these preferences is too long to send.
+    """
+    try:
+        await check_prompt_size(create_recipe_prompt(*preferences))
+    except PromptTooLongError as e:
+        print(f"\n[Input Error] Skipping a recipe request: {e}")
+        return False
+    return True
+
+async def generate_batch_chunk(preference_batch):
+    """
+    Requests the recipes for up to MAX_BATCH_SIZE sets of preferences in one Gemini call.
+    Returns the recipe texts in order, with None for any that could not be generated.
+    """
+    batch_prompt = create_batch_prompt(preference_batch)
+
+    try:
+        response = await request_recipe(batch_prompt, MAX_OUTPUT_TOKENS * len(preference_batch))  # Room for every recipe
+    except APIError as e:
+        print(f"\n[API Error] Could not generate recipe batch: {e}")
+        return [None] * len(preference_batch)
+    except Exception as e:
+        print(f"\n[Runtime Error] An unexpected error occurred: {e}")
+        return [None] * len(preference_batch)
+
+    return parse_batch_response(response.text or "", len(preference_batch))
+
+async def generate_recipes_batch(preference_list):
+    """
+    Generates a recipe for each (ingredients, diet, cuisine, time) tuple in preference_list.
+    Cached recipes are reused; the rest are requested in batches of up to MAX_BATCH_SIZE
+    per Gemini call, with the batches sent concurrently. Returns the recipe texts in the
+    same order, with None for failures.
+    """
+    cache_keys = [make_cache_key(*preferences) for preferences in preference_list]
+    recipes = await asyncio.gather(*[get_cached_recipe(key) for key in cache_keys])  # Start from any cached recipes
+    missing = [
+        index for index, recipe_text in enumerate(recipes)
+        if recipe_text is None and has_real_ingredient(preference_list[index][0])  # Skip invalid input locally
+    ]
+
+    # Leave out any request whose prompt would be too long on its own
+    fits = await asyncio.gather(*[prompt_fits(preference_list[index]) for index in missing])
+    missing = [index for index, index_fits in zip(missing, fits) if index_fits]
 
-        # Check if the response contains a valid text part before printing
-        if response.parts and hasattr(response, 'text'):
-            print(response.text.strip())  # Print the generated recipe
-        else:
-            print("⚠️ No valid recipe text found in the response.")
-            print("Full Response:", response)  # Print the full response for debugging
+    batches = [missing[start:start + MAX_BATCH_SIZE] for start in range(0, len(missing), MAX_BATCH_SIZE)]
+    results = await asyncio.gather(*[
+        generate_batch_chunk([preference_list[index] for index in batch]) for batch in batches
+    ])
 
-        print("=" * 50)
+    for batch, batch_recipes in zip(batches, results):
+        for index, recipe_text in zip(batch, batch_recipes):
+            if recipe_text is not None:
+                recipes[index] = recipe_text
+                await store_cached_recipe(cache_keys[index], recipe_text)  # Cache each recipe individually
 
+    return recipes
+
+# --- Concurrent Generation Section ---
+# This section generates several recipes with one Gemini call each, sent concurrently.
+# Up to MAX_CONCURRENT_REQUESTS calls overlap, so N recipes take roughly the time of
+# N / MAX_CONCURRENT_REQUESTS calls instead of N calls one after another.
+async def generate_recipe_text(ingredients, diet, cuisine, time):
+    """
+    Returns the complete recipe text for one set of preferences (reading the whole of
+    stream_recipe_text, so the cache and size checks are shared). Returns None if the
+    recipe could not be generated.
+    """
+    if not has_real_ingredient(ingredients):
+        return None  # Invalid input is rejected locally, without an API call
+
+    try:
+        chunks = [text async for text in stream_recipe_text(ingredients, diet, cuisine, time)]
+    except PromptTooLongError as e:
+        print(f"\n[Input Error] {e}")
+        return None
     except APIError as e:
         print(f"\n[API Error] Could not generate recipe: {e}")
-        print(f"Full API Response: {e}")  # Print the full error response
+        return None
     except Exception as e:
         print(f"\n[Runtime Error] An unexpected error occurred: {e}")
-        print(f"Full Exception: {e}")  # Print the full exception
+        return None
+
+    return "".join(chunks).strip() or None
+
+async def generate_recipes_concurrently(preference_list):
+    """
+    Generates a recipe for each (ingredients, diet, cuisine, time) tuple in preference_list,
+    one request per recipe, run concurrently. Returns the recipe texts in the same order,
+    with None for failures.
+    """
+    return await asyncio.gather(*[generate_recipe_text(*preferences) for preferences in preference_list])
 
 # --- Main Execution ---
-# This section ensures that the generate_recipe function is called when the script is run.
+# This section ensures that the recipe generator is run when the script is executed.
+def main():
+    """
+    Runs the recipe generator. The event loop runs in a background (daemon) thread, so the
+    connection is warmed up there while input() waits for the user on the main thread.
+    Keeping input() on the main thread means Ctrl-C still stops the script immediately.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    # Warm up the connection in the background while the user answers the questions
+    asyncio.run_coroutine_threadsafe(warm_up_connection(), loop)
+
+    ingredients, diet, cuisine, time = get_user_preferences()  # Get user preferences
+
+    # Generate the recipe on the event loop and wait for it to finish
+    asyncio.run_coroutine_threadsafe(generate_recipe(ingredients, diet, cuisine, time), loop).result()
+
+    # Close the asynchronous client's connection pool while the event loop is still running
+    asyncio.run_coroutine_threadsafe(client.aio.aclose(), loop).result()
+
 if __name__ == "__main__":
-    generate_recipe()  # Call the generate_recipe function to start the process
\ No newline at end of file
+    main()  # Call the main function to start the process
\ No newline at end of file
@@ -0,0 +1,109 @@
+import contextlib  # For the server's startup/shutdown (lifespan) handler
+import importlib.util  # For loading "AI Recipie.py", whose file name is not a valid module name
+import json  # For encoding Server-Sent Events
+import os  # For locating the recipe script next to this file
+from fastapi import FastAPI, HTTPException  # The web framework serving the recipe endpoints
+from fastapi.responses import StreamingResponse  # For streaming recipes back as they are generated
+from pydantic import BaseModel, Field  # For validating request bodies
+
+# --- Recipe Module Section ---
+# This section loads the recipe generator from "AI Recipie.py". The module creates the single
+# Gemini client, caches, and request semaphore that every request to this server shares.
+# Run the server with: uvicorn server:app --loop uvloop --http httptools --workers 4
+_spec = importlib.util.spec_from_file_location(
+    "recipe_chef", os.path.join(os.path.dirname(os.path.abspath(__file__)), "AI Recipie.py")
+)
+recipe_chef = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(recipe_chef)
+
+# --- Request Models Section ---
+# This section defines the JSON bodies accepted by the endpoints.
+MAX_BATCH_REQUESTS = 24  # The most recipes one /recipes call may ask for (4 batched Gemini calls)
+
+class RecipePreferences(BaseModel):
+    """
+    The user's preferences for one recipe; only the main ingredients are required.
+    """
+    ingredients: str
+    diet: str = ""
+    cuisine: str = ""
+    time: str = ""
+
+    def as_tuple(self):
+        """
+        Returns the preferences in the (ingredients, diet, cuisine, time) order used by the recipe module.
+        """
+        return self.ingredients.strip(), self.diet.strip(), self.cuisine.strip(), self.time.strip()
+
+class BatchRequest(BaseModel):
+    """
+    Several sets of preferences to generate recipes for at once (e.g. a meal plan).
+    With batched set to false, each recipe gets its own (concurrent) Gemini call instead
+    of being packed into shared batched calls.
+    """
+    requests: list[RecipePreferences] = Field(max_length=MAX_BATCH_REQUESTS)
+    batched: bool = True
+
+# --- Server Section ---
+# This section defines the FastAPI app. One warm process (per worker) serves many users,
+# so the interpreter, client, connection pool, and caches are not set up again for each recipe.
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """
+    Opens the connection to Gemini when the server starts, and cleans up when it stops.
+    """
+    await recipe_chef.warm_up_connection()
+    yield
+    await recipe_chef.client.aio.aclose()
+
+app = FastAPI(title="Gemini Recipe Chef", lifespan=lifespan)
+
+def format_event(data, event=None):
+    """
+    Formats one Server-Sent Event; the data is JSON-encoded so it fits on a single line.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/recipe")
+async def recipe(preferences: RecipePreferences):
+    """
+    Streams a recipe as Server-Sent Events: one event per chunk of text, then a "done"
+    event, or an "error" event if the recipe could not be generated.
+    """
+    ingredients, diet, cuisine, time = preferences.as_tuple()
+    if not recipe_chef.has_real_ingredient(ingredients):
+        raise HTTPException(status_code=422, detail="Need at least one real ingredient to generate a recipe.")
+
+    async def events():
+        try:
+            async for text in recipe_chef.stream_recipe_text(ingredients, diet, cuisine, time):
+                yield format_event({"text": text})
+        except recipe_chef.PromptTooLongError as e:
+            yield format_event({"detail": str(e)}, event="error")
+            return
+        except recipe_chef.APIError as e:
+            yield format_event({"detail": f"Could not generate recipe: {e}"}, event="error")
+            return
+        except Exception as e:
+            # Anything else (e.g. a network timeout part-way through the stream) still ends the stream cleanly
+            yield format_event({"detail": f"An unexpected error occurred: {e}"}, event="error")
+            return
+        yield format_event({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/recipes")
+async def recipes(batch: BatchRequest):
+    """
+    Generates several recipes with batched (or, if requested, concurrent individual)
+    Gemini calls and returns them together; a recipe that could not be generated is
+    returned as null.
+    """
+    preference_list = [preferences.as_tuple() for preferences in batch.requests]
+    if not all(recipe_chef.has_real_ingredient(ingredients) for ingredients, _, _, _ in preference_list):
+        raise HTTPException(status_code=422, detail="Need at least one real ingredient to generate each recipe.")
+
+    if batch.batched:
+        return {"recipes": await recipe_chef.generate_recipes_batch(preference_list)}
+    return {"recipes": await recipe_chef.generate_recipes_concurrently(preference_list)}